@@ -1,3 +1,51 @@
+import threading
+from typing import Any, Optional
+
 from boto3.session import Session
+from botocore.config import Config
+from botocore.session import get_session as get_botocore_session
+
+# Used by every client: enough pooled connections for the worker threads,
+# adaptive retries so that workers back off together when AWS throttles,
+# bounded timeouts so that a stuck connection fails instead of hanging a run,
+# and TCP keepalive so that pooled connections survive idle gaps between calls
+# instead of paying for a new TLS handshake.
+BOTO_CONFIG = Config(
+    max_pool_connections=50,
+    retries={"max_attempts": 10, "mode": "adaptive"},
+    connect_timeout=5,
+    read_timeout=30,
+    tcp_keepalive=True,
+)
+
+
+def new_session() -> Session:
+    """
+    Returns a session for the default credential chain whose STS clients use
+    the regional endpoint. botocore before 1.36 defaults to the global one,
+    which adds a round-trip to us-east-1 for every AssumeRole.
+    """
+    botocore_session = get_botocore_session()
+    botocore_session.set_config_variable("sts_regional_endpoints", "regional")
+    return Session(botocore_session=botocore_session)
+
+
+_clients: dict[tuple[Session, str, Optional[str]], Any] = {}
+_clients_lock = threading.Lock()
+
 
-session = Session()
+def get_client(session: Session, service_name: str, region_name: Optional[str] = None):
+    """
+    Returns a client for the service, creating it only once per session and
+    region. Clients are thread-safe, but creating them from a shared session
+    is not, hence the lock.
+    """
+    key = (session, service_name, region_name)
+    with _clients_lock:
+        client = _clients.get(key)
+        if client is None:
+            client = session.client(
+                service_name, region_name=region_name, config=BOTO_CONFIG  # type: ignore
+            )
+            _clients[key] = client
+    return client
@@ -1,18 +1,33 @@
+import functools
 import hashlib
 
-import boto3
 import click
 from mypy_boto3_sts import STSClient
 
+from .aws import get_client, new_session
+
+BACKEND_TEMPLATE = """terraform {{
+  backend "s3" {{
+    bucket         = "terraform-state-{hashed_environment_id}"
+    key            = "terraform/main/main.tfstate"
+    region         = "{aws_default_region}"
+    encrypt        = true
+    dynamodb_table = "terraform-state-lock-{hashed_environment_id}"
+  }}
+}}
+"""
+
 
 def get_aws_account_id(client: STSClient) -> str:
     account_id = client.get_caller_identity()["Account"]
     return account_id
 
 
-def hash_environment_id(tf_environment_id):
-    # Create a SHA-1 hash object
-    hash_object = hashlib.sha1()
+@functools.lru_cache(maxsize=None)
+def hash_environment_id(tf_environment_id: str) -> str:
+    # Create a SHA-1 hash object; the digest is only a stable name suffix,
+    # not a security primitive
+    hash_object = hashlib.sha1(usedforsecurity=False)
     # Update the hash object with the bytes of the string, encoding needed to convert str to bytes
     hash_object.update(tf_environment_id.encode("utf-8"))
     # Get the hexadecimal representation of the digest
@@ -21,16 +36,10 @@ def hash_environment_id(tf_environment_id):
 
 
 def write_backend_config(aws_default_region, hashed_environment_id):
-    backend_config = f"""terraform {{
-  backend "s3" {{
-    bucket         = "terraform-state-{hashed_environment_id}"
-    key            = "terraform/main/main.tfstate"
-    region         = "{aws_default_region}"
-    encrypt        = true
-    dynamodb_table = "terraform-state-lock-{hashed_environment_id}"
-  }}
-}}
-"""
+    backend_config = BACKEND_TEMPLATE.format(
+        aws_default_region=aws_default_region,
+        hashed_environment_id=hashed_environment_id,
+    )
     with open("backend.tf", "w") as f:
         f.write(backend_config)
 
@@ -38,8 +47,8 @@ def write_backend_config(aws_default_region, hashed_environment_id):
 @click.command(short_help="Generate backend.tf file based on current AWS environment.")
 def gen_tf_backend():
     """Generate backend.tf file."""
-    session = boto3.Session()
-    client = session.client("sts")
+    session = new_session()
+    client = get_client(session, "sts")
     aws_account_id = get_aws_account_id(client)
     region = session.region_name
     env_id = hash_environment_id(f"{aws_account_id}-{region}")
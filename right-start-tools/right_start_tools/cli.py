@@ -1,21 +1,36 @@
 # source: https://aws.amazon.com/blogs/architecture/field-notes-enroll-existing-aws-accounts-into-aws-control-tower/
 # file: https://raw.githubusercontent.com/aws-samples/aws-control-tower-reference-architectures/master/customizations/AccountFactory/EnrollAccount/enroll_account.py
 
+import functools
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
 import click
-from boto3.session import Session
 
 from right_start_tools import backend, show, vpc
 
+from .aws import new_session
+from .constants import MAX_WORKERS
+from .main import Account
 from .tools import Tools
 
-session = Session()
-t = Tools(session)
+
+@functools.lru_cache(maxsize=None)
+def _tools() -> Tools:
+    # Built on first use so that `--help` and commands that do not need
+    # the shared clients skip boto3 credential and client setup.
+    return Tools(new_session())
 
 
 @click.group()
-def cli() -> None:
+@click.option("-v", "--verbose", is_flag=True, help="Show debug output")
+def cli(verbose: bool) -> None:
     """This is a command line tool to get the weather."""
-    pass
+    # Only the package logger goes to DEBUG; botocore stays at WARNING.
+    logging.basicConfig(format="%(levelname)s %(name)s: %(message)s")
+    logging.getLogger("right_start_tools").setLevel(
+        logging.DEBUG if verbose else logging.INFO
+    )
 
 
 cli.add_command(vpc.process_vpcs)
@@ -31,13 +46,17 @@ if __name__ == "__main__":
 )
 def check_baseline() -> None:
     """Check if the RightStart account baseline is deployed to all accounts."""
-    root_id = t.org.get_root_id()
-    structure = t.org.get_org_structure(root_id)
-    accounts = structure.all_accounts()
-    for account in accounts:
-        tf_state_bucket_exists = t.check_tf_state_bucket(account)
-        if not tf_state_bucket_exists:
-            click.echo(f"TF state bucket for account '{account}' does not exist.")
+    t = _tools()
+    accounts = t.accounts
+    with ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
+        results = list(executor.map(t.check_tf_state_bucket, accounts))
+    msgs = [
+        f"TF state bucket for account '{account}' does not exist."
+        for account, tf_state_bucket_exists in zip(accounts, results)
+        if not tf_state_bucket_exists
+    ]
+    if msgs:
+        click.echo("\n".join(msgs))
 
 
 @click.command(
@@ -47,31 +66,51 @@ def check_baseline() -> None:
 def create_roles(dry_run: bool) -> None:
     """Check if the roles are deployed to all accounts."""
     # https://github.com/aws-samples/aws-control-tower-automate-account-creation/blob/master/functions/source/account_create.py
-    root_id = t.org.get_root_id()
-    structure = t.org.get_org_structure(root_id)
-    accounts = structure.all_accounts()
-
-    for account in accounts:
-        status = t.check_roles(account)
+    t = _tools()
+    structure = t.org_structure
+    accounts = t.accounts
+    with ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
+        statuses = list(executor.map(t.check_roles, accounts))
+
+    # Status lines are buffered and printed once; the missing roles are then
+    # created in all accounts concurrently.
+    msgs: list[str] = []
+    roles_to_create: list[tuple[Account, str]] = []
+    for account, status in zip(accounts, statuses):
         try:
             role_to_create = status.role_to_create()
-        except ValueError:
-            click.echo(
+        except ValueError as e:
+            msgs.append(
                 f"Unable to assume roles for account {account}. "
                 "Either roles are missing, there is an issue with the access, "
-                "or the account is suspended."
+                "or the account is suspended. "
+                f"error: {e}"
             )
             continue
         if role_to_create:
             if not dry_run:
-                click.echo(f"Creating role '{role_to_create}' in account {account}.")
-                t.create_admin_role_in_account(
-                    account, role_to_create, structure.master_account.id
-                )
+                roles_to_create.append((account, role_to_create))
             else:
-                click.echo(f"Role '{role_to_create}' is missing in account {account}.")
+                msgs.append(f"Role '{role_to_create}' is missing in account {account}.")
         else:
-            click.echo(f"Roles are already created in account {account}.")
+            msgs.append(f"Roles are already created in account {account}.")
+    if msgs:
+        click.echo("\n".join(msgs))
+
+    with ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
+        futures = []
+        for account, role_to_create in roles_to_create:
+            click.echo(f"Creating role '{role_to_create}' in account {account}.")
+            futures.append(
+                executor.submit(
+                    t.create_admin_role_in_account,
+                    account,
+                    role_to_create,
+                    structure.master_account.id,
+                )
+            )
+        for future in futures:
+            future.result()
     if not dry_run:
         click.echo("All set!")
 
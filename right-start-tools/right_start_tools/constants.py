@@ -1,2 +1,5 @@
 ORG_ACCESS_ROLE_NAME = "OrganizationAccountAccessRole"
 CT_EXECUTION_ROLE_NAME = "AWSControlTowerExecution"
+
+# Number of accounts processed concurrently by the per-account commands.
+MAX_WORKERS = 16
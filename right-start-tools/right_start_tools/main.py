@@ -1,13 +1,23 @@
+import itertools
 import json
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
-from typing import Callable, Literal
+from datetime import datetime, timedelta, timezone
+from functools import cached_property
+from typing import Callable, Iterator, Literal, Optional
 
 import boto3
+from botocore.credentials import DeferredRefreshableCredentials
+from botocore.exceptions import ClientError
+from botocore.session import get_session as get_botocore_session
 from mypy_boto3_iam import IAMClient
 from mypy_boto3_organizations import OrganizationsClient
 from mypy_boto3_organizations.type_defs import AccountTypeDef, OrganizationalUnitTypeDef
 from mypy_boto3_sts import STSClient
 
+from .aws import BOTO_CONFIG
+
 
 @dataclass
 class Parent:
@@ -41,6 +51,11 @@ class Account:
     def __repr__(self) -> str:
         return f"{self.name} ({self.id})"
 
+    def __hash__(self) -> int:
+        # The account id is unique within AWS, so hashing it alone is enough
+        # and avoids re-hashing the name and email on every dict lookup.
+        return hash(self.id)
+
 
 @dataclass
 class OU:
@@ -69,16 +84,15 @@ class ChildOU(OU):
     ous: list["ChildOU"]
 
     def all_accounts(self) -> list[Account]:
-        return ChildOU._all_accounts(self)
+        return list(self.iter_accounts())
 
-    @staticmethod
-    def _all_accounts(ou: "ChildOU") -> list[Account]:
-        accounts = []
-        for account in ou.accounts:
-            accounts.append(account)
-        for child_ou in ou.ous:
-            accounts.extend(ChildOU._all_accounts(child_ou))
-        return accounts
+    def iter_accounts(self) -> Iterator[Account]:
+        """Yields the accounts of this OU and its descendants, depth first."""
+        stack: list[ChildOU] = [self]
+        while stack:
+            ou = stack.pop()
+            yield from ou.accounts
+            stack.extend(reversed(ou.ous))
 
 
 @dataclass
@@ -88,13 +102,17 @@ class OrgStructure:
     master_account: Account
 
     def all_accounts(self) -> list[Account]:
-        accounts = []
-        for child in self.children:
-            accounts.extend(child.all_accounts())
-        return accounts
+        return list(
+            itertools.chain.from_iterable(
+                child.iter_accounts() for child in self.children
+            )
+        )
 
 
 class Organizations:
+    # Organizations API rate limits are low, so keep the fan-out modest.
+    MAX_WORKERS = 4
+
     def __init__(self, client: OrganizationsClient):
         self.client = client
 
@@ -136,74 +154,222 @@ class Organizations:
         response = self.client.list_parents(ChildId=child_id)
         return Parent.from_dict(response["Parents"][0])  # type: ignore
 
-    def get_root_id(self) -> str:
+    @cached_property
+    def root_id(self) -> str:
         return self.client.list_roots()["Roots"][0]["Id"]  # type: ignore
 
+    @cached_property
+    def master_account(self) -> Account:
+        master_account_id = self.client.describe_organization()["Organization"]["MasterAccountId"]  # type: ignore
+        return Account.from_dict(
+            self.client.describe_account(AccountId=master_account_id)["Account"]
+        )
+
+    def get_root_id(self) -> str:
+        return self.root_id
+
+    def iter_accounts(self, parent_id) -> Iterator[Account]:
+        """
+        Yields accounts under a given parent ID (OU), fetching pages lazily.
+        """
+        paginator = self.client.get_paginator("list_accounts_for_parent")
+        pages = paginator.paginate(ParentId=parent_id)
+        for account in pages.search("Accounts[]"):
+            yield Account.from_dict(account)
+
     def list_accounts(self, parent_id) -> list[Account]:
         """
         Lists accounts under a given parent ID (OU).
         """
-        accounts = []
-        paginator = self.client.get_paginator("list_accounts_for_parent")
-        for account_page in paginator.paginate(ParentId=parent_id):
-            for account in account_page["Accounts"]:
-                accounts.append(Account.from_dict(account))
-        return accounts
+        return list(self.iter_accounts(parent_id))
+
+    def iter_ous(self, parent_id) -> Iterator[OU]:
+        """
+        Yields organizational units (OUs) under a given parent ID (OU), fetching
+        pages lazily.
+        """
+        paginator = self.client.get_paginator("list_organizational_units_for_parent")
+        pages = paginator.paginate(ParentId=parent_id)
+        for ou in pages.search("OrganizationalUnits[]"):
+            yield OU.from_dict(ou)
 
     def list_ous(self, parent_id) -> list[OU]:
         """
         Lists organizational units (OUs) under a given parent ID (OU).
         """
-        ous = []
-        paginator = self.client.get_paginator("list_organizational_units_for_parent")
-        for ou_page in paginator.paginate(ParentId=parent_id):
-            for ou in ou_page["OrganizationalUnits"]:
-                ous.append(OU.from_dict(ou))
-        return ous
+        return list(self.iter_ous(parent_id))
 
-    def get_org_structure(self, root_id: str) -> OrgStructure:
-        master_account_id = self.client.describe_organization()["Organization"]["MasterAccountId"]  # type: ignore
-        master_account = Account.from_dict(
-            self.client.describe_account(AccountId=master_account_id)["Account"]
-        )
+    def get_org_structure(self, root_id: Optional[str] = None) -> OrgStructure:
+        root_id = root_id or self.root_id
         children = self._get_children(root_id)
-        return OrgStructure(root_id, children, master_account)
+        return OrgStructure(root_id, children, self.master_account)
 
     def _get_children(self, parent_id) -> list[ChildOU]:
-        children = []
-        for ou in self.list_ous(parent_id):
-            accounts = self.list_accounts(ou.id)
-            ous = self._get_children(ou.id)
-            children.append(ChildOU(ou.id, ou.arn, ou.name, accounts, ous))
-        return children
+        """
+        Walks the OU tree level by level, listing the OUs and accounts of all
+        parents on the same level concurrently.
+        """
+        children: dict[str, list[ChildOU]] = {parent_id: []}
+        pending = [parent_id]
+        with ThreadPoolExecutor(max_workers=self.MAX_WORKERS) as executor:
+            while pending:
+                level: list[ChildOU] = []
+                for pending_id, ous in zip(
+                    pending, executor.map(self.list_ous, pending)
+                ):
+                    for ou in ous:
+                        child = ChildOU(ou.id, ou.arn, ou.name, [], [])
+                        children[pending_id].append(child)
+                        children[ou.id] = child.ous
+                        level.append(child)
+                pending = [child.id for child in level]
+                for child, accounts in zip(
+                    level, executor.map(self.list_accounts, pending)
+                ):
+                    child.accounts.extend(accounts)
+        return children[parent_id]
 
 
 class STS:
+    # Cached credentials are reused until they are this close to expiring.
+    # Matches botocore's advisory refresh window, so that a refreshing session
+    # gets new credentials as soon as it asks for them.
+    EXPIRATION_BUFFER = timedelta(minutes=15)
+    # AccessDenied is remembered for this long, so repeated checks of a
+    # missing role don't call STS again.
+    DENIED_TTL = timedelta(seconds=60)
+
     def __init__(self, client: STSClient):
         self.client = client
+        self._credentials: dict[tuple[str, str, str], dict] = {}
+        self._sessions: dict[tuple[str, str, str], boto3.Session] = {}
+        self._denied: dict[tuple[str, str, str], tuple[ClientError, datetime]] = {}
+        self._lock = threading.Lock()
+        self._key_locks: dict[tuple[str, str, str], threading.Lock] = {}
+
+    def _lock_for(self, key: tuple[str, str, str]) -> threading.Lock:
+        with self._lock:
+            return self._key_locks.setdefault(key, threading.Lock())
+
+    def _cached_credentials(self, key: tuple[str, str, str]) -> Optional[dict]:
+        credentials = self._credentials.get(key)
+        if (
+            credentials is None
+            or credentials["Expiration"] - datetime.now(timezone.utc)
+            <= self.EXPIRATION_BUFFER
+        ):
+            return None
+        return credentials
+
+    def _assume_role(
+        self, account_id: str, role_name: str, session_name: str = "AssumeRoleSession"
+    ) -> dict:
+        """
+        Returns the credentials for the role, calling AssumeRole only if there
+        are no cached credentials that are still valid.
+        """
+        key = (account_id, role_name, session_name)
+        credentials = self._cached_credentials(key)
+        if credentials is not None:
+            return credentials
+        # Only one thread per role calls AssumeRole, the others wait for it
+        # and pick up its result.
+        with self._lock_for(key):
+            credentials = self._cached_credentials(key)
+            if credentials is not None:
+                return credentials
+            denied = self._denied.get(key)
+            if denied is not None and denied[1] > datetime.now(timezone.utc):
+                raise denied[0]
+            try:
+                assumed_role_object = self.client.assume_role(
+                    RoleArn=f"arn:aws:iam::{account_id}:role/{role_name}",
+                    RoleSessionName=session_name,
+                )
+            except ClientError as e:
+                if e.response["Error"]["Code"] == "AccessDenied":
+                    self._denied[key] = (
+                        e,
+                        datetime.now(timezone.utc) + self.DENIED_TTL,
+                    )
+                raise
+            self._denied.pop(key, None)
+            credentials = assumed_role_object["Credentials"]
+            self._credentials[key] = credentials  # type: ignore
+            return credentials  # type: ignore
+
+    def forget_denied(self, account_id: str, role_name: str):
+        """
+        Drops remembered AccessDenied results for the role, e.g. after the
+        account was moved away from the SCP that denied it.
+        """
+        # _denied is guarded by the per-key locks; _key_locks, which has an
+        # entry for every key ever looked up, is guarded by _lock.
+        with self._lock:
+            keys = [
+                key for key in self._key_locks if key[:2] == (account_id, role_name)
+            ]
+        for key in keys:
+            with self._lock_for(key):
+                self._denied.pop(key, None)
 
     def assume_role_and_get_credentials(
         self, account_id: str, role_name: str, session_name: str = "AssumeRoleSession"
     ):
-        assumed_role_object = self.client.assume_role(
-            RoleArn=f"arn:aws:iam::{account_id}:role/{role_name}",
-            RoleSessionName=session_name,
-        )
-        credentials = assumed_role_object["Credentials"]
+        credentials = self._assume_role(account_id, role_name, session_name)
         return {
             "aws_access_key_id": credentials["AccessKeyId"],
             "aws_secret_access_key": credentials["SecretAccessKey"],
             "aws_session_token": credentials["SessionToken"],
         }
 
+    def get_session(
+        self, account_id: str, role_name: str, session_name: str = "AssumeRoleSession"
+    ) -> boto3.Session:
+        """
+        Returns a session for the given role in the given account. The session
+        re-assumes the role on its own when its credentials are about to
+        expire, so it can be kept for long runs and shared between threads.
+        """
+        key = (account_id, role_name, session_name)
+        # Assume the role up front so that access errors surface here rather
+        # than on the first API call made with the session.
+        self._assume_role(*key)
+        with self._lock_for(key):
+            return self._get_or_create_session(key)
+
+    def _get_or_create_session(self, key: tuple[str, str, str]) -> boto3.Session:
+        session = self._sessions.get(key)
+        if session is None:
+
+            def refresh() -> dict:
+                credentials = self._assume_role(*key)
+                return {
+                    "access_key": credentials["AccessKeyId"],
+                    "secret_key": credentials["SecretAccessKey"],
+                    "token": credentials["SessionToken"],
+                    "expiry_time": credentials["Expiration"].isoformat(),
+                }
+
+            botocore_session = get_botocore_session()
+            botocore_session.set_config_variable("sts_regional_endpoints", "regional")
+            botocore_session._credentials = DeferredRefreshableCredentials(
+                refresh_using=refresh, method="sts-assume-role"
+            )
+            session = boto3.Session(botocore_session=botocore_session)
+            self._sessions[key] = session
+        return session
+
 
 class IAM:
     def __init__(self, client: IAMClient):
         self.client = client
+        # Roles known to exist; roles are never deleted during a run.
+        self._existing_roles: set[str] = set()
 
     @staticmethod
     def from_credentials(credentials: dict) -> "IAM":
-        return IAM(boto3.client("iam", **credentials))
+        return IAM(boto3.client("iam", config=BOTO_CONFIG, **credentials))
 
     def create_admin_role(self, management_account_id: str, role_name: str):
         self.client.create_role(
@@ -228,10 +394,14 @@ class IAM:
         self.client.attach_role_policy(
             RoleName=role_name, PolicyArn="arn:aws:iam::aws:policy/AdministratorAccess"
         )
+        self._existing_roles.add(role_name)
 
     def is_role_exists(self, role_name: str) -> bool:
+        if role_name in self._existing_roles:
+            return True
         try:
             self.client.get_role(RoleName=role_name)
+            self._existing_roles.add(role_name)
             return True
         except self.client.exceptions.NoSuchEntityException:
             return False
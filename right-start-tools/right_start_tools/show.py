@@ -1,35 +1,49 @@
+from typing import Optional
+
 import click
 from boto3 import Session
 
 from . import main as rst
+from .aws import get_client
 
 OU_SYMBOL = click.style("➜", fg="blue")
 ACCOUNT_SYMBOL = click.style("•", fg="green")
 
 
-def show_children(ous: list[rst.ChildOU], indent=0):
+def format_children(
+    ous: list[rst.ChildOU], indent=0, lines: Optional[list[str]] = None
+) -> list[str]:
+    if lines is None:
+        lines = []
+    prefix = "  " * indent
+    account_prefix = prefix + "    "
     for ou in ous:
-        click.echo("  " * indent + f"{OU_SYMBOL} {ou.name} ({ou.id})")
+        lines.append(f"{prefix}{OU_SYMBOL} {ou.name} ({ou.id})")
         for account in ou.accounts:
-            click.echo(
-                "  " * (indent + 2) + f"{ACCOUNT_SYMBOL} {account.name} ({account.id})"
+            lines.append(
+                f"{account_prefix}{ACCOUNT_SYMBOL} {account.name} ({account.id})"
             )
-        show_children(ou.ous, indent + 2)
+        format_children(ou.ous, indent + 2, lines)
+    return lines
+
+
+def show_children(ous: list[rst.ChildOU], indent=0):
+    click.echo("\n".join(format_children(ous, indent)))
 
 
 def print_org_structure(structure: rst.OrgStructure):
-    click.echo(f"Root: {structure.root_id}")
-    click.echo(
-        f"{ACCOUNT_SYMBOL} Master Account: {structure.master_account.name} ({structure.master_account.id})"
-    )
-    show_children(structure.children)
+    lines = [
+        f"Root: {structure.root_id}",
+        f"{ACCOUNT_SYMBOL} Master Account: {structure.master_account.name} ({structure.master_account.id})",
+    ]
+    format_children(structure.children, lines=lines)
+    click.echo("\n".join(lines))
 
 
 @click.command(short_help="Show the structure of the AWS Organization")
 def show_org_structure() -> None:
     """Show the structure of the AWS Organization."""
     session = Session()
-    org = rst.Organizations(session.client("organizations"))
-    root_id = org.get_root_id()
-    structure = org.get_org_structure(root_id)
+    org = rst.Organizations(get_client(session, "organizations"))
+    structure = org.get_org_structure()
     print_org_structure(structure)
@@ -1,22 +1,51 @@
+import logging
+import threading
 from dataclasses import dataclass
+from functools import cached_property
 from typing import Optional
 
 import click
 from boto3.session import Session
+from mypy_boto3_sts.type_defs import GetCallerIdentityResponseTypeDef
 
 from right_start_tools import backend
 
 from . import main as rst
+from .aws import get_client
 from .constants import CT_EXECUTION_ROLE_NAME, ORG_ACCESS_ROLE_NAME
 
+logger = logging.getLogger(__name__)
+
+# Each role can be used to create the other one.
+_OTHER_ROLE = {
+    ORG_ACCESS_ROLE_NAME: CT_EXECUTION_ROLE_NAME,
+    CT_EXECUTION_ROLE_NAME: ORG_ACCESS_ROLE_NAME,
+}
+
+
+def _other_role(role_name: str) -> str:
+    try:
+        return _OTHER_ROLE[role_name]
+    except KeyError:
+        raise ValueError(f"Unknown role name: {role_name}") from None
+
 
 @dataclass
 class RolesStatus:
-    org_access: bool
-    ct_execution: bool
+    """
+    Whether each role is present in the account. A role counts as present if
+    it could be assumed, or if iam:GetRole found it through the other role;
+    a role found that way is not necessarily assumable. None means the role
+    couldn't be looked up.
+    """
+
+    org_access: Optional[bool]
+    ct_execution: Optional[bool]
 
     def role_to_create(self) -> Optional[str]:
-        if self.org_access is False and self.ct_execution is False:
+        if self.org_access is None or self.ct_execution is None:
+            raise ValueError("Unable to look up the roles in IAM.")
+        elif self.org_access is False and self.ct_execution is False:
             raise ValueError(
                 "Both 'OrganizationAccountAccessRole' and 'AWSControlTowerExecution' are missing."
             )
@@ -31,26 +60,100 @@ class RolesStatus:
 class Tools:
     def __init__(self, session: Session):
         self.session = session
-        self.org = rst.Organizations(session.client("organizations"))  # type: ignore
-        self.sts = rst.STS(session.client("sts"))  # type: ignore
-        self.iam = rst.IAM(session.client("iam"))  # type: ignore
+        self.org = rst.Organizations(get_client(session, "organizations"))
+        self.sts = rst.STS(get_client(session, "sts"))
+        self.iam = rst.IAM(get_client(session, "iam"))
+        self._account_iams: dict[Session, rst.IAM] = {}
+        self._account_iams_lock = threading.Lock()
+
+    @cached_property
+    def org_structure(self) -> rst.OrgStructure:
+        """Organization tree, fetched once and shared by all commands."""
+        return self.org.get_org_structure()
+
+    @cached_property
+    def accounts(self) -> list[rst.Account]:
+        return self.org_structure.all_accounts()
+
+    @cached_property
+    def caller_identity(self) -> GetCallerIdentityResponseTypeDef:
+        """Identity of the base session, fetched once."""
+        return self.sts.client.get_caller_identity()
+
+    def _get_account_iam(self, account: rst.Account, role_name: str) -> rst.IAM:
+        """
+        Returns the IAM wrapper for the account as seen through the given role,
+        reusing it so that known roles are not looked up again.
+        """
+        # Keyed by session; sessions refresh their own credentials.
+        session = self.sts.get_session(account.id, role_name)
+        # Locked so that concurrent workers share one wrapper, and with it
+        # the roles it already knows about.
+        with self._account_iams_lock:
+            iam = self._account_iams.get(session)
+            if iam is None:
+                iam = rst.IAM(get_client(session, "iam"))
+                self._account_iams[session] = iam
+        return iam
 
     def create_admin_role_in_account(
         self, account: rst.Account, role_to_create: str, master_account_id: str
     ):
-        if role_to_create == ORG_ACCESS_ROLE_NAME:
-            role_name = CT_EXECUTION_ROLE_NAME
-        elif role_to_create == CT_EXECUTION_ROLE_NAME:
-            role_name = ORG_ACCESS_ROLE_NAME
+        role_name = _other_role(role_to_create)
 
-        credentials = self.sts.assume_role_and_get_credentials(account.id, role_name)
-        iam = rst.IAM.from_credentials(credentials)
+        iam = self._get_account_iam(account, role_name)
 
         if iam.is_role_exists(role_to_create):
             return
 
         iam.create_admin_role(master_account_id, role_to_create)
 
+    def _ask_to_create_role(
+        self, account: rst.Account, role_name: str, master_account_id: str
+    ):
+        """
+        Assumes `role_name` in the account and offers to create the other role
+        through it. Fails with AccessDenied if the role can't be assumed.
+        """
+        create_role_name = _other_role(role_name)
+
+        iam = self._get_account_iam(account, role_name)
+
+        if iam.is_role_exists(create_role_name):
+            click.echo(
+                f"Role `{create_role_name}` already exists in account '{account.id}'."
+            )
+            return
+
+        if click.confirm(f"Create role `{create_role_name}` in account {account.id}?"):
+            iam.create_admin_role(master_account_id, create_role_name)
+            click.echo("Done!")
+        else:
+            click.echo("Role not created.")
+
+    def _move_to_root_and_retry(
+        self, account: rst.Account, role_name: str, master_account_id: str
+    ) -> bool:
+        """
+        Offers to move the account to the root, out of reach of the SCP that
+        denies `role_name`, and tries again from there. The account is moved
+        back afterwards. Returns False if the user declined the move.
+        """
+        if not click.confirm(f"Move account '{account.id}' to the root and try again?"):
+            return False
+        parent_id = self.org.get_parent(account.id).id
+        root_id = self.org.get_root_id()
+        self.org.move_account(account.id, parent_id, root_id)
+        click.echo(f"Account '{account.id}' moved to the root.")
+        self.sts.forget_denied(account.id, role_name)
+        try:
+            self._ask_to_create_role(account, role_name, master_account_id)
+        except Exception as e:
+            click.echo(f"Error: {e}")
+        self.org.move_account(account.id, root_id, parent_id)
+        click.echo(f"Account '{account.id}' moved back to '{parent_id}'.")
+        return True
+
     def try_to_assume_and_ask_to_create_role(
         self,
         account: rst.Account,
@@ -58,109 +161,91 @@ class Tools:
         master_account_id: str,
         move_to_root: bool = False,
     ):
-        if role_name == ORG_ACCESS_ROLE_NAME:
-            create_role_name = CT_EXECUTION_ROLE_NAME
-        elif role_name == CT_EXECUTION_ROLE_NAME:
-            create_role_name = ORG_ACCESS_ROLE_NAME
-        else:
-            raise ValueError(f"Unknown role name: {role_name}")
-
-        try:
-            credentials = self.sts.assume_role_and_get_credentials(
-                account.id, role_name
-            )
-            iam = rst.IAM.from_credentials(credentials)
+        other_role_name = _other_role(role_name)
 
-            if iam.is_role_exists(create_role_name):
-                click.echo(
-                    f"Role `{create_role_name}` already exists in account '{account.id}'."
-                )
+        # Each role is tried once: if the first one can't be assumed, the
+        # missing role may still be created through the other one.
+        for current_role in (role_name, other_role_name):
+            try:
+                self._ask_to_create_role(account, current_role, master_account_id)
                 return
-
-            if click.confirm(
-                f"Create role `{create_role_name}` in account {account.id}?"
-            ):
-                iam.create_admin_role(master_account_id, create_role_name)
-                click.echo("Done!")
-            else:
-                click.echo("Role not created.")
-
-        except self.sts.client.exceptions.ClientError as e:
-            if e.response["Error"]["Code"] == "AccessDenied":
-                # if we failed to assume the role, that means that
-                # we can create it using other role
+            except self.sts.client.exceptions.ClientError as e:
+                if e.response["Error"]["Code"] != "AccessDenied":
+                    raise e
                 click.echo(
-                    f"Failed to assume role `{role_name}` in account '{account.id}': Access Denied"
+                    f"Failed to assume role `{current_role}` in account '{account.id}': Access Denied"
                 )
-                print(e.response["Error"])
+                logger.debug("AssumeRole error: %s", e.response["Error"])
                 error_message = e.response["Error"]["Message"]
-                if "with an explicit deny in a service control policy" in error_message:
-                    click.echo(
-                        f"Account '{account.id}' has an SCP that denies access to the role `{role_name}`."
-                    )
-                    if click.confirm(
-                        f"Move account '{account.id}' to the root and try again?"
-                    ):
-                        parent_id = self.org.get_parent(account.id).id
-                        root_id = self.org.get_root_id()
-                        self.org.move_account(account.id, parent_id, root_id)
-                        click.echo(f"Account '{account.id}' moved to the root.")
-                        try:
-                            self.try_to_assume_and_ask_to_create_role(
-                                account, role_name, master_account_id
-                            )
-                        except Exception as e:
-                            click.echo(f"Error: {e}")
-                        self.org.move_account(account.id, root_id, parent_id)
-                        click.echo(
-                            f"Account '{account.id}' moved back to '{parent_id}'."
-                        )
-                        return
-                else:
+                if (
+                    "with an explicit deny in a service control policy"
+                    not in error_message
+                ):
                     raise e
-
-                role_name, create_role_name = create_role_name, role_name
-                self.try_to_assume_and_ask_to_create_role(
-                    account, role_name, master_account_id
+                click.echo(
+                    f"Account '{account.id}' has an SCP that denies access to the role `{current_role}`."
                 )
+                if self._move_to_root_and_retry(
+                    account, current_role, master_account_id
+                ):
+                    return
 
     def check_roles(
         self,
         account: rst.Account,
     ) -> RolesStatus:
-        def _check_role(role_name: str) -> bool:
+        def _account_iam(role_name: str) -> Optional[rst.IAM]:
+            logger.debug("Checking role %s in account %s", role_name, account)
             try:
-                self.sts.assume_role_and_get_credentials(account.id, role_name)
-                return True
+                return self._get_account_iam(account, role_name)
             except self.sts.client.exceptions.ClientError as e:
                 if e.response["Error"]["Code"] == "AccessDenied":
-                    return False
+                    return None
                 else:
                     raise e
 
-        return RolesStatus(
-            org_access=_check_role(ORG_ACCESS_ROLE_NAME),
-            ct_execution=_check_role(CT_EXECUTION_ROLE_NAME),
-        )
+        def _role_exists(iam: rst.IAM, role_name: str) -> Optional[bool]:
+            try:
+                return iam.is_role_exists(role_name)
+            except iam.client.exceptions.ClientError as e:
+                # e.g. GetRole denied by an SCP or a permissions boundary; only
+                # this account is affected.
+                logger.warning(
+                    "Unable to look up role %s in account %s: %s", role_name, account, e
+                )
+                return None
+
+        # One working role is enough to look the other one up with GetRole;
+        # the other role is only assumed when the first one can't be.
+        iam = _account_iam(ORG_ACCESS_ROLE_NAME)
+        if iam is not None:
+            return RolesStatus(
+                org_access=True,
+                ct_execution=_role_exists(iam, CT_EXECUTION_ROLE_NAME),
+            )
+        iam = _account_iam(CT_EXECUTION_ROLE_NAME)
+        if iam is not None:
+            return RolesStatus(
+                org_access=_role_exists(iam, ORG_ACCESS_ROLE_NAME),
+                ct_execution=True,
+            )
+        return RolesStatus(org_access=False, ct_execution=False)
 
     def check_tf_state_bucket(self, account: rst.Account) -> bool:
         try:
-            credentials = self.sts.assume_role_and_get_credentials(
-                account.id, ORG_ACCESS_ROLE_NAME
-            )
+            session = self.sts.get_session(account.id, ORG_ACCESS_ROLE_NAME)
         except Exception as e:
             click.echo(
                 f"Failed to assume role `{ORG_ACCESS_ROLE_NAME}` in account '{account.id}': {e}"
             )
             return False
 
-        session = Session(**credentials)  # type: ignore
-        sts = session.client("sts")
-        s3 = session.client("s3")
+        s3 = get_client(session, "s3")
 
-        aws_account_id = backend.get_aws_account_id(sts)
+        # The assumed role lives in the account itself, so its id is known
+        # without asking STS.
         region = session.region_name
-        env_id = backend.hash_environment_id(f"{aws_account_id}-{region}")
+        env_id = backend.hash_environment_id(f"{account.id}-{region}")
         bucket_name = f"terraform-state-{env_id}"
 
         # find the bucket
@@ -1,3 +1,5 @@
+import logging
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from typing import Optional
 
 import click
@@ -5,10 +7,16 @@ from boto3.session import Session
 from mypy_boto3_ec2 import EC2Client
 from mypy_boto3_ec2.service_resource import SecurityGroup, Vpc
 
-from .aws import session
+from .aws import get_client, new_session
 from .constants import CT_EXECUTION_ROLE_NAME
+from .main import Account
 from .tools import Tools
 
+logger = logging.getLogger(__name__)
+
+# Number of subnets and internet gateways of a VPC deleted concurrently.
+DELETE_WORKERS = 8
+
 # note: Account factory for Terraform do it like
 # [this](https://github.com/aws-ia/terraform-aws-control_tower_account_factory/blob/main/src/aft_lambda/aft_feature_options/aft_delete_default_vpc.py).
 
@@ -18,12 +26,14 @@ class EC2:
         self.client = client
 
     def get_all_regions_names(self) -> list[str]:
-        response = self.client.describe_regions()
-        regions = []
-        for region in response["Regions"]:
-            if region_name := region.get("RegionName"):
-                regions.append(region_name)
-        return regions
+        # Only the regions enabled for this account. Opt-in regions can differ
+        # between accounts, so the list is not shared across them.
+        response = self.client.describe_regions(AllRegions=False)
+        return [
+            region["RegionName"]
+            for region in response["Regions"]
+            if "RegionName" in region
+        ]
 
 
 def get_default_security_group(vpc: Vpc) -> Optional[SecurityGroup]:
@@ -34,73 +44,162 @@ def get_default_security_group(vpc: Vpc) -> Optional[SecurityGroup]:
             return sg
 
 
+def _boto_session_for_account(
+    t: Tools, account: Account, management_account_id: str
+) -> Optional[Session]:
+    # The caller's own (management) account has no execution role to assume,
+    # so skip it without a doomed AssumeRole call.
+    if account.id == management_account_id:
+        click.echo(f"Skipping account {account}: it is the caller's own account.")
+        return None
+    try:
+        return t.sts.get_session(account.id, CT_EXECUTION_ROLE_NAME)
+    except Exception as e:
+        click.echo(
+            f"Unable to assume roles for account {account}. "
+            "Either roles are missing, there is an issue with the access, "
+            "or the account is suspended. "
+            f"error: {e}"
+        )
+        return None
+
+
+def _delete_internet_gateway(ec2_client: EC2Client, igw_id: str, vpc_id: str) -> None:
+    ec2_client.detach_internet_gateway(InternetGatewayId=igw_id, VpcId=vpc_id)
+    ec2_client.delete_internet_gateway(InternetGatewayId=igw_id)
+
+
+def _process_region_for_account(
+    ec2_client: EC2Client, account: Account, region: str, dry_run: bool
+) -> None:
+    logger.debug("Checking VPCs in region %s of account %s", region, account)
+    default_vpcs = ec2_client.describe_vpcs(
+        Filters=[{"Name": "isDefault", "Values": ["true"]}]
+    )["Vpcs"]
+    for vpc in default_vpcs:
+        vpc_id = vpc["VpcId"]
+        # A VPC with network interfaces in use can't be deleted. Pages are read
+        # only until the first interface; EC2 filters each page on its own, so
+        # an empty page can still be followed by a full one. Full-size pages
+        # keep this to one call for all but the busiest regions.
+        pages = ec2_client.get_paginator("describe_network_interfaces").paginate(
+            Filters=[{"Name": "vpc-id", "Values": [vpc_id]}],
+            PaginationConfig={"PageSize": 1000},
+        )
+        if page := next((page for page in pages if page["NetworkInterfaces"]), None):
+            enis = page["NetworkInterfaces"]
+            count = f"{len(enis)}+" if "NextToken" in page else str(len(enis))
+            click.echo(
+                f"Skipping default VPC {vpc_id} in region {region} of account {account}: "
+                f"{count} network interface(s) in use, "
+                f"e.g. '{enis[0].get('Description', '')}'"
+            )
+            continue
+        subnet_ids = list(
+            ec2_client.get_paginator("describe_subnets")
+            .paginate(Filters=[{"Name": "vpc-id", "Values": [vpc_id]}])
+            .search("Subnets[].SubnetId")
+        )
+        igw_ids = list(
+            ec2_client.get_paginator("describe_internet_gateways")
+            .paginate(Filters=[{"Name": "attachment.vpc-id", "Values": [vpc_id]}])
+            .search("InternetGateways[].InternetGatewayId")
+        )
+        if not dry_run:
+            # Subnets and internet gateways don't depend on each other, so
+            # they are all removed at once before the VPC itself.
+            with ThreadPoolExecutor(max_workers=DELETE_WORKERS) as executor:
+                futures = [
+                    executor.submit(ec2_client.delete_subnet, SubnetId=subnet_id)
+                    for subnet_id in subnet_ids
+                ]
+                futures += [
+                    executor.submit(
+                        _delete_internet_gateway, ec2_client, igw_id, vpc_id
+                    )
+                    for igw_id in igw_ids
+                ]
+                for future in as_completed(futures):
+                    future.result()
+        else:
+            for subnet_id in subnet_ids:
+                click.echo(
+                    f"Would delete subnet {subnet_id} in region {region} of account {account}"
+                )
+            for igw_id in igw_ids:
+                click.echo(
+                    f"Would detach and delete internet gateway {igw_id} in region {region} of account {account}"
+                )
+        # Delete the default VPC
+        if not dry_run:
+            ec2_client.delete_vpc(VpcId=vpc_id)
+        else:
+            click.echo(
+                f"Would delete default VPC {vpc_id} in region {region} of account {account}"
+            )
+
+
+def _regions_for_account(
+    t: Tools, account: Account, management_account_id: str
+) -> list[tuple[str, EC2Client]]:
+    """Returns an EC2 client for every region enabled in the account."""
+    click.echo(f"Processing account {account}...")
+    acc_session = _boto_session_for_account(t, account, management_account_id)
+    if acc_session is None:
+        return []
+
+    ec2 = EC2(get_client(acc_session, "ec2"))
+    return [
+        (region, get_client(acc_session, "ec2", region))
+        for region in ec2.get_all_regions_names()
+    ]
+
+
 @click.command(short_help="Process VPCs in all regions.")
 @click.option("--dry-run", is_flag=True, help="Run without making changes")
-def process_vpcs(dry_run: bool):
+@click.option(
+    "--workers",
+    default=32,
+    show_default=True,
+    type=click.IntRange(min=1),
+    help="Number of account and region tasks run concurrently",
+)
+def process_vpcs(dry_run: bool, workers: int):
     """Process VPCs in all accounts/regions."""
-    t = Tools(session)
+    t = Tools(new_session())
 
-    root_id = t.org.get_root_id()
-    structure = t.org.get_org_structure(root_id)
-    accounts = structure.all_accounts()
+    accounts = t.accounts
+    # Resolved before fanning out, so the workers don't race to fetch it.
+    management_account_id = t.caller_identity["Account"]
     click.echo("Dry run" if dry_run else "Processing VPCs...")
-    for account in accounts:
-        try:
-            click.echo(f"Processing account {account}...")
+    # One pool for the whole run: accounts are resolved to their regions
+    # first, and every (account, region) pair is then a task of its own, so
+    # no task ever waits on another one in the same pool.
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        account_futures = {
+            executor.submit(
+                _regions_for_account, t, account, management_account_id
+            ): account
+            for account in accounts
+        }
+        region_futures = {}
+        for future in as_completed(account_futures):
+            account = account_futures[future]
             try:
-                credentials = t.sts.assume_role_and_get_credentials(
-                    account.id, CT_EXECUTION_ROLE_NAME
+                regions = future.result()
+            except Exception as e:
+                logger.error("Failed to process account %s: %s", account, e)
+                continue
+            for region, ec2_client in regions:
+                region_future = executor.submit(
+                    _process_region_for_account, ec2_client, account, region, dry_run
                 )
-
+                region_futures[region_future] = (account, region)
+        for future in as_completed(region_futures):
+            account, region = region_futures[future]
+            try:
+                future.result()
             except Exception as e:
-                click.echo(
-                    f"Unable to assume roles for account {account}. "
-                    "Either roles are missing, there is an issue with the access, "
-                    "or the account is suspended."
-                    f"error: {e}"
+                logger.error(
+                    "Failed to process region %s of account %s: %s", region, account, e
                 )
-
-            acc_session = Session(
-                aws_access_key_id=credentials["aws_access_key_id"],
-                aws_secret_access_key=credentials["aws_secret_access_key"],
-                aws_session_token=credentials["aws_session_token"],
-            )
-
-            ec2 = EC2(acc_session.client("ec2"))
-            regions = ec2.get_all_regions_names()
-
-            for region in regions:
-                ec2_resource = acc_session.resource("ec2", region_name=region)
-
-                # Find all VPCs in the region
-                vpcs = list(ec2_resource.vpcs.all())
-
-                for vpc in vpcs:
-                    if vpc.is_default:
-                        # Delete all subnets
-                        for subnet in vpc.subnets.all():
-                            if not dry_run:
-                                subnet.delete()
-                            else:
-                                click.echo(
-                                    f"Would delete subnet {subnet.id} in region {region}"
-                                )
-                        # Detach and delete all internet gateways
-                        for igw in vpc.internet_gateways.all():
-                            if not dry_run:
-                                vpc.detach_internet_gateway(InternetGatewayId=igw.id)
-                                igw.delete()
-                            else:
-                                click.echo(
-                                    f"Would detach and delete internet gateway {igw.id} in region {region}"
-                                )
-                        # Delete the default VPC
-                        if not dry_run:
-                            vpc.delete()
-                        else:
-                            click.echo(
-                                f"Would delete default VPC {vpc.id} in region {region}"
-                            )
-        except Exception as e:
-            print(f"Failed to process account {account}: {e}")
-            continue
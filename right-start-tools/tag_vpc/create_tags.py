@@ -1,5 +1,6 @@
 import boto3
 import get_tags
+from botocore.exceptions import ClientError
 
 TAGS_TO_CREATE = {}  # <------ Copy output from get_tags.py here
 VPC_ID = ""  # <------ VPC ID
@@ -7,15 +8,41 @@ REGION = "us-east-1"
 DRY_RUN = False  # Set this to False to apply tagging for subnets in the account
 
 
+MAX_RESOURCES_PER_CALL = 1000  # CreateTags limit
+
+
 def create_tag(subnet_id: str, tag_object: dict, ec2_client) -> None:  # noqa: ANN001
-    try:
-        tags_to_create = [
-            {"Key": str(key), "Value": str(value)} for key, value in tag_object.items()
-        ]
-        ec2_client.create_tags(Resources=[subnet_id], Tags=tags_to_create)
-    except Exception as e:
-        print(f"An error occurred: {e}")
-        return None
+    create_tag_for_subnets([subnet_id], tag_object, ec2_client)
+
+
+def create_tag_for_subnets(
+    subnet_ids: list[str],
+    tag_object: dict,
+    ec2_client,  # noqa: ANN001
+    dry_run: bool = False,
+) -> bool:
+    # With dry_run, EC2 checks permissions and resources without tagging and
+    # answers DryRunOperation on success.
+    tags_to_create = [
+        {"Key": str(key), "Value": str(value)} for key, value in tag_object.items()
+    ]
+    success = True
+    for i in range(0, len(subnet_ids), MAX_RESOURCES_PER_CALL):
+        try:
+            ec2_client.create_tags(
+                Resources=subnet_ids[i : i + MAX_RESOURCES_PER_CALL],
+                Tags=tags_to_create,
+                DryRun=dry_run,
+            )
+        except ClientError as e:
+            if dry_run and e.response["Error"]["Code"] == "DryRunOperation":
+                continue
+            print(f"An error occurred: {e}")
+            success = False
+        except Exception as e:
+            print(f"An error occurred: {e}")
+            success = False
+    return success
 
 
 if __name__ == "__main__":
@@ -26,9 +53,11 @@ if __name__ == "__main__":
         print("Please set TAGS_TO_CREATE variable.")
         exit(1)
 
-    ec2_client = boto3.client("ec2", region_name=REGION)  # type: ignore # noqa: PGH003
+    ec2_client = boto3.client("ec2", region_name=REGION, config=get_tags.BOTO_CONFIG)  # type: ignore # noqa: PGH003
     subnets = get_tags.get_subnets_by_vpc_id(VPC_ID, ec2_client)
     if subnets is not None:
+        # Subnets that end up with the same tags are tagged in one API call.
+        subnets_by_tags: dict[frozenset, list[str]] = {}
         for subnet in subnets:
             if subnet["SubnetId"] in TAGS_TO_CREATE:
                 tags_to_create = TAGS_TO_CREATE[subnet["SubnetId"]]
@@ -36,11 +65,28 @@ if __name__ == "__main__":
                     f"{tags_to_create['NamePrefix']}{tags_to_create['Type']}-{subnet['AvailabilityZone']}"
                 )
                 del tags_to_create["NamePrefix"]
+                existing_tags = {
+                    tag["Key"]: tag["Value"] for tag in subnet.get("Tags", [])
+                }
+                if all(
+                    existing_tags.get(key) == str(value)
+                    for key, value in tags_to_create.items()
+                ):
+                    print(f"Tags already set for {subnet['SubnetId']}.")
+                    continue
                 print(f"Tags to create: {tags_to_create}")
-                if not DRY_RUN:
-                    create_tag(subnet["SubnetId"], tags_to_create, ec2_client)
-                    print(f"Tags created for {subnet['SubnetId']}.")
+                subnets_by_tags.setdefault(
+                    frozenset(tags_to_create.items()), []
+                ).append(subnet["SubnetId"])
             else:
                 print(f"Tags not found for {subnet['SubnetId']}.")
+        for tags, subnet_ids in subnets_by_tags.items():
+            if create_tag_for_subnets(
+                subnet_ids, dict(tags), ec2_client, dry_run=DRY_RUN
+            ):
+                if DRY_RUN:
+                    print(f"Dry run succeeded for {', '.join(subnet_ids)}.")
+                else:
+                    print(f"Tags created for {', '.join(subnet_ids)}.")
     else:
         print("No subnets found.")
@@ -1,45 +1,59 @@
+import functools
 import json
+import re
 
 import boto3
 import create_tags
+from botocore.config import Config
 
 VPC_ID = ""
 REGION = "us-east-1"
 VPC_NAME = "apps"  # Necessary to separate name from subnet type, e.g., "apps-db"
-VALID_SUBNET_TYPES = [
-    "public",
-    "private",
-    "db",
-    "redshift",
-    "elasticache",
-    "intra",
-    "outpost",
-]  # subnet types from VPC module
+VALID_SUBNET_TYPES = frozenset(
+    {
+        "public",
+        "private",
+        "db",
+        "redshift",
+        "elasticache",
+        "intra",
+        "outpost",
+    }
+)  # subnet types from VPC module
 CREATE_TAGS = True  # Set this to True to apply tagging for subnets in the account
+# Back off and retry on EC2 throttling instead of failing after 3 attempts.
+BOTO_CONFIG = Config(retries={"max_attempts": 10, "mode": "adaptive"})
 
 
-def get_subnets_by_vpc_id(vpc_id: str, ec2_client) -> list[dict] | None:  # noqa: ANN001
+def get_subnets_by_vpc_id(
+    vpc_id: str, ec2_client, extra_filters: list[dict] | None = None  # noqa: ANN001
+) -> list[dict] | None:
     try:
-        response = ec2_client.describe_subnets(
-            Filters=[{"Name": "vpc-id", "Values": [vpc_id]}]
+        # A single DescribeSubnets page may not hold every subnet of a large VPC.
+        pages = ec2_client.get_paginator("describe_subnets").paginate(
+            Filters=[{"Name": "vpc-id", "Values": [vpc_id]}, *(extra_filters or [])]
         )
-        return response["Subnets"] if "Subnets" in response else None
+        return list(pages.search("Subnets[]"))
     except Exception as e:
         print(f"An error occurred: {e}")
         return None
 
 
+@functools.lru_cache(maxsize=None)
+def _subnet_name_pattern(
+    vpc_name: str, valid_subnet_types: frozenset[str]
+) -> re.Pattern[str]:
+    subnet_types = "|".join(map(re.escape, sorted(valid_subnet_types)))
+    return re.compile(rf"{re.escape(vpc_name)}-({subnet_types})-")
+
+
 def get_subnet_type_suffix(
-    subnet_name: str, valid_subnet_types: list[str]
+    subnet_name: str, valid_subnet_types: frozenset[str]
 ) -> str | None:
     # default name from module is : <name_that_user_gave_to_vpc>-<subnet_type>-<az_id>
     # So we want to get the second part of the name.
-    name_parts = subnet_name.split("-")
-    if len(name_parts) >= 3 and name_parts[0] == VPC_NAME:  # noqa: PLR2004
-        subnet_type = name_parts[1]
-        if subnet_type in valid_subnet_types:
-            return subnet_type
-    return None
+    match = _subnet_name_pattern(VPC_NAME, valid_subnet_types).match(subnet_name)
+    return match.group(1) if match else None
 
 
 if __name__ == "__main__":
@@ -54,28 +68,40 @@ if __name__ == "__main__":
     if not CREATE_TAGS:
         print("CREATE_TAGS is set to False. Tags will not be created.")
 
-    ec2_client = boto3.client("ec2", region_name=REGION)  # type: ignore # noqa: PGH003
+    ec2_client = boto3.client("ec2", region_name=REGION, config=BOTO_CONFIG)  # type: ignore # noqa: PGH003
     all_tags = {}
-    if subnets := get_subnets_by_vpc_id(VPC_ID, ec2_client):
+    # Subnets of the same type in the same AZ get the same tags, so each such
+    # group is tagged in one API call.
+    subnet_names_by_tags: dict[frozenset, dict[str, str]] = {}
+    # Only subnets named after the VPC can carry a subnet type, so let EC2
+    # filter out the rest.
+    name_filter = {"Name": "tag:Name", "Values": [f"{VPC_NAME}-*"]}
+    if subnets := get_subnets_by_vpc_id(VPC_ID, ec2_client, [name_filter]):
         for subnet in subnets:
-            subnet_name = [
-                tag["Value"] for tag in subnet["Tags"] if tag["Key"] == "Name"
-            ][0]
+            subnet_tags = {tag["Key"]: tag["Value"] for tag in subnet.get("Tags", ())}
+            subnet_name = subnet_tags.get("Name", "")
             if subnet_type := get_subnet_type_suffix(subnet_name, VALID_SUBNET_TYPES):
                 tags = {
                     "NamePrefix": f"{VPC_NAME}-",
                     "AvailabilityZoneId": subnet["AvailabilityZoneId"],
                     "Type": subnet_type,
                 }
-                if CREATE_TAGS:
-                    create_tags.create_tag(subnet["SubnetId"], tags, ec2_client)
-                    print(
-                        f"Next tags were created for {subnet_name}:",
-                        json.dumps(tags, indent=4),
-                    )
+                subnet_names_by_tags.setdefault(frozenset(tags.items()), {})[
+                    subnet["SubnetId"]
+                ] = subnet_name
                 all_tags[f"{subnet['SubnetId']}"] = tags
             else:
                 print(f"Invalid or unexpected name '{subnet_name}'.")
     else:
         print("No subnets found.")
+    if CREATE_TAGS:
+        for tags, subnet_names in subnet_names_by_tags.items():
+            if create_tags.create_tag_for_subnets(
+                list(subnet_names), dict(tags), ec2_client
+            ):
+                for subnet_id, subnet_name in subnet_names.items():
+                    print(
+                        f"Next tags were created for {subnet_name}:",
+                        json.dumps(all_tags[subnet_id], indent=4),
+                    )
     print("Tags to create in other account:", json.dumps(all_tags, indent=4))